@@ -0,0 +1,85 @@
+"""Memory benchmark: ``conda list --json`` dicts vs. ``PackageSnapshot`` records.
+
+Builds synthetic prefixes shaped like real ``conda list --json`` output and
+measures the bytes retained per package record with ``tracemalloc``. Two
+fleets are measured: one where prefixes share two package lists (the best
+case for interning) and one where every prefix has distinct versions and
+builds, which bounds the per-record saving from below.
+
+    PYTHONPATH=src python benchmarks/bench_package_records.py [--records N] [--prefixes P]
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import tracemalloc
+from typing import Callable, List
+
+from conda_controlplane.core.common import PackageSnapshot
+
+
+def _fake_conda_list(n: int, seed: int, *, distinct: bool = False) -> str:
+    channels = ["pkgs/main", "conda-forge"]
+    entries = []
+    for i in range(n):
+        name = f"pkg-{i:05d}"
+        version = f"{1 + i % 7}.{(i + seed) % 13}.{i % 5}"
+        build = f"py311h{i % 4096:06x}_{i % 3}"
+        if distinct:
+            version = f"{version}.{seed}"
+            build = f"py311h{(i * 7919 + seed) % 16**6:06x}_{seed}"
+        entries.append(
+            {
+                "base_url": f"https://repo.anaconda.com/{channels[i % 2]}",
+                "build_number": i % 3,
+                "build_string": build,
+                "channel": channels[i % 2],
+                "dist_name": f"{name}-{version}-{build}",
+                "name": name,
+                "platform": "noarch" if i % 5 == 0 else "linux-64",
+                "version": version,
+            }
+        )
+    return json.dumps(entries)
+
+
+def _retained(build: Callable[[], object]) -> int:
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    keep = build()
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del keep
+    return after - before
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=500, help="Packages per prefix.")
+    parser.add_argument("--prefixes", type=int, default=40, help="Number of prefixes (snapshots) kept alive.")
+    args = parser.parse_args(argv)
+
+    total = args.records * args.prefixes
+    print(f"records: {total} ({args.prefixes} prefixes x {args.records})")
+    for label, distinct, seeds in (
+        # Prefixes in a fleet mostly share packages: alternate two variants.
+        ("shared (2 package lists)", False, [p % 2 for p in range(args.prefixes)]),
+        # Worst case for interning: no version or build repeats across prefixes.
+        ("distinct per prefix", True, list(range(args.prefixes))),
+    ):
+        raw = [_fake_conda_list(args.records, seed=seed, distinct=distinct) for seed in seeds]
+        dict_bytes = _retained(lambda: [json.loads(r) for r in raw])
+        snap_bytes = _retained(lambda: [PackageSnapshot.from_json(json.loads(r)) for r in raw])
+        print(f"\n{label}:")
+        print(f"  list[dict] (conda list --json): {dict_bytes / total:8.1f} bytes/record")
+        print(f"  PackageSnapshot:                {snap_bytes / total:8.1f} bytes/record")
+        print(f"  reduction:                      {dict_bytes / max(snap_bytes, 1):8.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,21 +1,59 @@
 from __future__ import annotations
 
 import argparse
+import os
 import sys
+import time
 from typing import Dict, List, Optional
 
-from conda_controlplane.core.common import package_map
-from conda_controlplane.core.conda_base import CondaNotFoundError, load_packages, make_conda_context
+from conda_controlplane.core.common import PackageSnapshot
+from conda_controlplane.core.conda_base import (
+    CondaContext,
+    CondaNotFoundError,
+    guess_bindir,
+    load_conda_meta,
+    load_snapshot,
+    make_conda_context,
+)
 from conda_controlplane.core.formatting import (
     format_json,
+    format_policy_summary,
     format_report_summary,
     format_report_table,
 )
 from conda_controlplane.core.inspect_compilers import inspect_compilers
-from conda_controlplane.core.inspect_controlplane import inspect_all
+from conda_controlplane.core.inspect_controlplane import CATEGORY_INSPECTORS, inspect_all
 from conda_controlplane.core.inspect_network import inspect_network
 from conda_controlplane.core.inspect_packaging import inspect_packaging
 from conda_controlplane.core.inspect_solvers import inspect_solvers
+from conda_controlplane.core.lockfile import HASH_KINDS, export_locks
+from conda_controlplane.core.metrics import (
+    format_openmetrics,
+    format_policy_openmetrics,
+    write_textfile,
+)
+from conda_controlplane.core.policy import PolicyError, compile_policy, load_rules
+from conda_controlplane.core.snapshot_cache import cached_conda_meta
+from conda_controlplane.core.state import build_state, state_path, write_state
+
+
+_LOCK_ONLY_OPTIONS = {
+    "prefix": "--prefix",
+    "category": "--category",
+    "hash": "--hash",
+    "output_dir": "--output-dir",
+    "jobs": "--jobs",
+}
+
+
+def _positive_int(value: str) -> int:
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid integer: {value!r}") from None
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be >= 1 (got {number})")
+    return number
 
 
 def _build_parser(*, prog: str) -> argparse.ArgumentParser:
@@ -23,7 +61,7 @@ def _build_parser(*, prog: str) -> argparse.ArgumentParser:
     parser.add_argument("--base-prefix", help="Override base prefix (default: conda info --base)")
     parser.add_argument(
         "--format",
-        choices=["json", "table", "summary"],
+        choices=["json", "table", "summary", "openmetrics"],
         default="summary",
         help="Output format",
     )
@@ -32,9 +70,129 @@ def _build_parser(*, prog: str) -> argparse.ArgumentParser:
     sub = parser.add_subparsers(dest="command", required=True)
     for cmd in ("solvers", "compilers", "packaging", "network", "all"):
         sub.add_parser(cmd, help=f"Inspect {cmd} control-plane category.")
+
+    export = sub.add_parser("export", help="Export control-plane state for external collectors or as lockfiles.")
+    mode = export.add_mutually_exclusive_group(required=True)
+    mode.add_argument(
+        "--textfile-dir",
+        help="Atomically write OpenMetrics for all categories into this node_exporter textfile directory.",
+    )
+    mode.add_argument(
+        "--lock",
+        action="store_true",
+        help="Write an explicit URL+hash lockfile built from conda-meta (conda is not invoked).",
+    )
+    export.add_argument(
+        "--prefix",
+        action="append",
+        help="Prefix to lock; repeat for several (default: the base prefix).",
+    )
+    export.add_argument(
+        "--category",
+        action="append",
+        choices=sorted(CATEGORY_INSPECTORS),
+        help="Only lock packages selected by this category; repeatable.",
+    )
+    export.add_argument("--hash", choices=HASH_KINDS, help="Hash appended to each URL (default: md5).")
+    export.add_argument("--output-dir", help="Write <prefix-name>.txt per prefix here instead of stdout.")
+    export.add_argument("--jobs", type=_positive_int, help="Parallel workers for several prefixes.")
+
+    policy = sub.add_parser("policy", help="Evaluate base-environment policy rules.")
+    policy.add_argument("--rules", help="TOML or JSON rule file (default: built-in base-env policy).")
+    policy.add_argument(
+        "--prefix",
+        action="append",
+        default=[],
+        help="Prefix to check; repeat for several (default: the base prefix).",
+    )
+    policy.add_argument("--exit-code", action="store_true", help="Exit with status 1 when any rule is violated.")
+
+    sub.add_parser("state", help="Refresh the prompt state file and print its path.")
     return parser
 
 
+def _run_policy(args, ctx: Optional[CondaContext]) -> int:
+    """Evaluate policy; ``ctx`` is None when only explicit ``--prefix`` targets are given."""
+    try:
+        policy = compile_policy(load_rules(args.rules))
+    except (OSError, PolicyError) as exc:
+        print(f"ERROR: {exc}", file=sys.stderr)
+        return 2
+
+    results = {}
+    failed = False
+    for prefix in args.prefix or [ctx.base_prefix]:
+        # Read conda-meta (plus pip's site-packages entries, as `conda list`
+        # does) so a fleet run never boots conda per prefix, and one unreadable
+        # prefix is reported instead of aborting the rest.
+        try:
+            snapshot = load_conda_meta(prefix, include_pip=True)
+        except (OSError, RuntimeError) as exc:
+            results[prefix] = {"ok": False, "error": str(exc), "violations": {}}
+            failed = True
+            continue
+        results[prefix] = policy.evaluate(snapshot)
+        if ctx is not None and prefix == ctx.base_prefix:
+            _refresh_state(args, ctx, snapshot, None if args.rules else results[prefix])
+    ok = all(r["ok"] for r in results.values())
+    report = {"ok": ok, "rules": len(policy.rules), "categories": policy.categories, "prefixes": results}
+
+    if args.format == "json":
+        print(format_json(report))
+    elif args.format == "openmetrics":
+        print(format_policy_openmetrics(report), end="")
+    else:
+        print(format_policy_summary(report, verbose=args.verbose))
+    if failed:
+        return 2
+    return 1 if args.exit_code and not ok else 0
+
+
+def _run_export_lock(args, prefixes: List[str]) -> int:
+    if len(prefixes) > 1 and not args.output_dir:
+        print("ERROR: --output-dir is required when locking several prefixes", file=sys.stderr)
+        return 2
+    names = [os.path.basename(os.path.normpath(p)) for p in prefixes]
+    if args.output_dir and len(set(names)) != len(names):
+        print("ERROR: prefixes must have distinct directory names to share --output-dir", file=sys.stderr)
+        return 2
+
+    locks, errors = export_locks(
+        prefixes,
+        categories=args.category,
+        hash_kind=args.hash or "md5",
+        max_workers=args.jobs,
+    )
+    for prefix, error in errors.items():
+        print(f"ERROR: {prefix}: {error}", file=sys.stderr)
+
+    if not args.output_dir:
+        if locks:
+            print(locks[prefixes[0]], end="")
+    else:
+        for prefix, lock in locks.items():
+            name = os.path.basename(os.path.normpath(prefix))
+            print(write_textfile(args.output_dir, lock, name=f"{name}.txt"))
+    return 2 if errors else 0
+
+
+def _run_export_textfile(args, ctx) -> int:
+    t0 = time.perf_counter()
+    try:
+        snapshot, cache = cached_conda_meta(ctx.base_prefix)
+    except (OSError, RuntimeError) as exc:
+        print(f"ERROR: {exc}", file=sys.stderr)
+        return 2
+    t1 = time.perf_counter()
+    payload = inspect_all(ctx, packages=snapshot)
+    t2 = time.perf_counter()
+    _refresh_state(args, ctx, snapshot)
+
+    timings = {"load_packages": t1 - t0, "inspect": t2 - t1, "total": t2 - t0}
+    print(write_textfile(args.textfile_dir, format_openmetrics(payload, timings=timings, cache=cache)))
+    return 0
+
+
 def _payload_for_category(name: str, category: Dict[str, object], ctx) -> Dict[str, object]:
     return {
         "base_prefix": ctx.base_prefix,
@@ -43,9 +201,46 @@ def _payload_for_category(name: str, category: Dict[str, object], ctx) -> Dict[s
     }
 
 
+def _refresh_state(args, ctx, snapshot: PackageSnapshot, policy_result=None) -> Optional[str]:
+    """Best-effort update of the prompt state file; never fails the command.
+
+    The state file describes the discovered base under the built-in policy,
+    so runs against an overridden ``--base-prefix`` leave it untouched and
+    ``policy_result`` must come from the built-in rules (or be None).
+    """
+    if args.base_prefix:
+        return None
+    try:
+        return write_state(build_state(ctx, snapshot, policy_result=policy_result))
+    except OSError:
+        return None
+
+
 def main(argv: Optional[List[str]] = None, *, prog: Optional[str] = None) -> int:
     prog = prog or "conda-controlplane"
-    args = _build_parser(prog=prog).parse_args(argv)
+    parser = _build_parser(prog=prog)
+    args = parser.parse_args(argv)
+
+    if args.command == "state" and args.base_prefix:
+        parser.error("state: the state file always tracks the discovered base; drop --base-prefix")
+
+    if args.command == "export" and not args.lock:
+        given = [flag for dest, flag in _LOCK_ONLY_OPTIONS.items() if getattr(args, dest) is not None]
+        if given:
+            parser.error(f"export: {', '.join(given)} only apply with --lock")
+    if args.command == "export" and args.lock and (args.prefix or args.base_prefix):
+        # Explicit prefixes need neither conda nor base discovery.
+        return _run_export_lock(args, args.prefix or [args.base_prefix])
+    if args.command == "policy" and (args.prefix or args.base_prefix):
+        # Policy reads conda-meta too; only base discovery would need conda.
+        ctx = None
+        if args.base_prefix:
+            ctx = CondaContext(conda_exe="", base_prefix=args.base_prefix, bin_dir=guess_bindir(args.base_prefix))
+        return _run_policy(args, ctx)
+    if args.command == "export" and args.base_prefix:
+        # The textfile scan reads conda-meta, so a known base never starts conda.
+        ctx = CondaContext(conda_exe="", base_prefix=args.base_prefix, bin_dir=guess_bindir(args.base_prefix))
+        return _run_export_textfile(args, ctx)
 
     try:
         ctx = make_conda_context(base_prefix=args.base_prefix)
@@ -56,27 +251,47 @@ def main(argv: Optional[List[str]] = None, *, prog: Optional[str] = None) -> int
         print(f"ERROR: {exc}", file=sys.stderr)
         return 2
 
+    if args.command == "policy":
+        return _run_policy(args, ctx)
+    if args.command == "export":
+        if args.lock:
+            return _run_export_lock(args, [ctx.base_prefix])
+        return _run_export_textfile(args, ctx)
+
+    t0 = time.perf_counter()
+    snapshot = load_snapshot(ctx)
+    t1 = time.perf_counter()
+    state_file = _refresh_state(args, ctx, snapshot)
+
+    if args.command == "state":
+        if state_file is None:
+            print(f"ERROR: could not write state file {state_path()}", file=sys.stderr)
+            return 2
+        print(state_file)
+        return 0
+
     if args.command == "all":
-        payload = inspect_all(ctx)
+        payload = inspect_all(ctx, packages=snapshot)
+    elif args.command == "solvers":
+        payload = _payload_for_category(args.command, inspect_solvers(ctx, snapshot), ctx)
+    elif args.command == "compilers":
+        payload = _payload_for_category(args.command, inspect_compilers(ctx, snapshot), ctx)
+    elif args.command == "packaging":
+        payload = _payload_for_category(args.command, inspect_packaging(ctx, snapshot), ctx)
+    elif args.command == "network":
+        payload = _payload_for_category(args.command, inspect_network(ctx, snapshot), ctx)
     else:
-        pkgs = package_map(load_packages(ctx))
-        if args.command == "solvers":
-            cat = inspect_solvers(ctx, pkgs)
-        elif args.command == "compilers":
-            cat = inspect_compilers(ctx, pkgs)
-        elif args.command == "packaging":
-            cat = inspect_packaging(ctx, pkgs)
-        elif args.command == "network":
-            cat = inspect_network(ctx, pkgs)
-        else:
-            print(f"Unknown command: {args.command}", file=sys.stderr)
-            return 2
-        payload = _payload_for_category(args.command, cat, ctx)
+        print(f"Unknown command: {args.command}", file=sys.stderr)
+        return 2
+    t2 = time.perf_counter()
+    timings = {"load_packages": t1 - t0, "inspect": t2 - t1, "total": t2 - t0}
 
     if args.format == "json":
         print(format_json(payload))
     elif args.format == "table":
         print(format_report_table(payload, verbose=args.verbose))
+    elif args.format == "openmetrics":
+        print(format_openmetrics(payload, timings=timings), end="")
     else:
         print(format_report_summary(payload, verbose=args.verbose))
 
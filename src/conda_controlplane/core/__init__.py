@@ -1,10 +1,13 @@
 """Core helpers for inspecting the conda control plane."""
 
+from .common import PackageRecord, PackageSnapshot
 from .conda_base import (
     CondaContext,
     CondaNotFoundError,
     guess_bindir,
+    load_conda_meta,
     load_packages,
+    load_snapshot,
     make_conda_context,
 )
 from .inspect_controlplane import inspect_all
@@ -14,10 +17,14 @@ from .inspect_packaging import inspect_packaging
 from .inspect_network import inspect_network
 
 __all__ = [
+    "PackageRecord",
+    "PackageSnapshot",
     "CondaContext",
     "CondaNotFoundError",
     "guess_bindir",
+    "load_conda_meta",
     "load_packages",
+    "load_snapshot",
     "make_conda_context",
     "inspect_all",
     "inspect_solvers",
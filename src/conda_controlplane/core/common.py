@@ -1,10 +1,162 @@
 from __future__ import annotations
 
-from typing import Dict, Iterable, List
+import re
+import sys
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional
 
 PackageJson = List[Dict[str, object]]
 
 
+# conda-meta channel URL -> (subdir suffix, channel_alias or default host).
+_CHANNEL_SUBDIR = re.compile(r"/(?:noarch|(?:linux|osx|win|freebsd|zos|emscripten|wasi)-[a-z0-9]+)$")
+_CHANNEL_HOSTS = re.compile(r"^https?://(?:conda\.anaconda\.org|repo\.anaconda\.com)/")
+
+
+def _str(value: Any) -> str:
+    return sys.intern(value) if isinstance(value, str) else ""
+
+
+def canonical_channel(channel: str) -> str:
+    """Return the channel name ``conda list`` shows for a conda-meta channel URL.
+
+    ``https://repo.anaconda.com/pkgs/main/linux-64`` becomes ``pkgs/main`` and
+    ``https://conda.anaconda.org/conda-forge/noarch`` becomes ``conda-forge``;
+    other URLs only lose the subdir. Assumes the default ``channel_alias``.
+    """
+    channel = _CHANNEL_SUBDIR.sub("", channel.rstrip("/"))
+    return _CHANNEL_HOSTS.sub("", channel)
+
+
+class PackageRecord:
+    """Compact, immutable-by-convention record for one installed package.
+
+    Uses ``__slots__`` and interned strings so fleets of snapshots share the
+    storage for repeated names, versions, channels and subdirs.
+    """
+
+    __slots__ = ("name", "version", "build", "build_number", "channel", "subdir", "url", "md5", "sha256")
+
+    def __init__(
+        self,
+        name: str,
+        version: str,
+        build: str = "",
+        build_number: int = 0,
+        channel: str = "",
+        subdir: str = "",
+        url: str = "",
+        md5: str = "",
+        sha256: str = "",
+    ) -> None:
+        self.name = _str(name)
+        self.version = _str(version)
+        self.build = _str(build)
+        self.build_number = build_number
+        self.channel = _str(channel)
+        self.subdir = _str(subdir)
+        # Per-artifact values: not interned, they are unique per record.
+        self.url = url if isinstance(url, str) else ""
+        self.md5 = md5 if isinstance(md5, str) else ""
+        self.sha256 = sha256 if isinstance(sha256, str) else ""
+
+    @classmethod
+    def from_json(cls, entry: Mapping[str, Any]) -> Optional["PackageRecord"]:
+        """Build a record from a ``conda list --json`` or ``conda-meta`` entry.
+
+        Returns None when the entry has no usable name or version.
+        """
+        name = entry.get("name")
+        version = entry.get("version")
+        if not isinstance(name, str) or not isinstance(version, str):
+            return None
+        build_number = entry.get("build_number")
+        subdir = entry.get("subdir") or entry.get("platform") or ""
+        channel = entry.get("channel") or ""
+        if isinstance(channel, str) and "://" in channel:
+            # conda-meta stores the channel URL including a subdir.
+            channel = canonical_channel(channel)
+        return cls(
+            name,
+            version,
+            build=entry.get("build_string") or entry.get("build") or "",
+            build_number=build_number if isinstance(build_number, int) else 0,
+            channel=channel,
+            subdir=subdir,
+            url=entry.get("url") or "",
+            md5=entry.get("md5") or "",
+            sha256=entry.get("sha256") or "",
+        )
+
+    def to_dict(self) -> Dict[str, object]:
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, PackageRecord):
+            return NotImplemented
+        return all(getattr(self, s) == getattr(other, s) for s in self.__slots__)
+
+    def __hash__(self) -> int:
+        return hash((self.name, self.version, self.build))
+
+    def __repr__(self) -> str:
+        return f"PackageRecord({self.name!r}, {self.version!r}, build={self.build!r}, channel={self.channel!r})"
+
+
+class PackageSnapshot(Mapping[str, str]):
+    """Name-indexed set of :class:`PackageRecord` objects for one prefix.
+
+    Behaves as a read-only ``name -> version`` mapping iterated in sorted name
+    order, so it can be passed anywhere a version map is expected; the full
+    records are available through :meth:`record` and :meth:`records`.
+    """
+
+    __slots__ = ("_records",)
+
+    def __init__(self, records: Iterable[PackageRecord] = ()) -> None:
+        by_name = {r.name: r for r in records}
+        self._records: Dict[str, PackageRecord] = {n: by_name[n] for n in sorted(by_name)}
+
+    @classmethod
+    def from_json(cls, pkgs_json: Iterable[Mapping[str, Any]]) -> "PackageSnapshot":
+        """Build a snapshot from ``conda list --json`` entries."""
+        records = (PackageRecord.from_json(p) for p in pkgs_json)
+        return cls(r for r in records if r is not None)
+
+    @classmethod
+    def from_versions(cls, pkg_versions: Mapping[str, str]) -> "PackageSnapshot":
+        """Build a snapshot from a plain ``name -> version`` mapping."""
+        if isinstance(pkg_versions, PackageSnapshot):
+            return pkg_versions
+        return cls(PackageRecord(n, v) for n, v in pkg_versions.items())
+
+    def __getitem__(self, name: str) -> str:
+        return self._records[name].version
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._records
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._records)
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __repr__(self) -> str:
+        return f"PackageSnapshot({len(self._records)} records)"
+
+    def record(self, name: str) -> Optional[PackageRecord]:
+        return self._records.get(name)
+
+    def records(self) -> Iterator[PackageRecord]:
+        """Iterate records in sorted name order."""
+        return iter(self._records.values())
+
+    def select(self, names: Iterable[str]) -> "PackageSnapshot":
+        """Return a sub-snapshot holding only the named packages that are present."""
+        recs = self._records
+        return PackageSnapshot(recs[n] for n in names if n in recs)
+
+
 def package_map(pkgs_json: PackageJson) -> Dict[str, str]:
     """Convert ``conda list`` JSON entries to ``name -> version`` map."""
     out: Dict[str, str] = {}
@@ -16,5 +168,7 @@ def package_map(pkgs_json: PackageJson) -> Dict[str, str]:
     return out
 
 
-def select_versions(pkg_versions: Dict[str, str], names: Iterable[str]) -> Dict[str, str]:
+def select_versions(pkg_versions: Mapping[str, str], names: Iterable[str]) -> Mapping[str, str]:
+    if isinstance(pkg_versions, PackageSnapshot):
+        return pkg_versions.select(names)
     return {n: pkg_versions[n] for n in names if n in pkg_versions}
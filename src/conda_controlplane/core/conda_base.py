@@ -2,10 +2,13 @@ from __future__ import annotations
 
 import json
 import os
+import re
 import shutil
 import subprocess
 from dataclasses import dataclass
-from typing import Any, Callable, Dict, List, Optional
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from .common import PackageRecord, PackageSnapshot
 
 
 class CondaNotFoundError(RuntimeError):
@@ -88,6 +91,112 @@ def load_packages(ctx: CondaContext, runner: Runner = _run) -> List[Dict[str, An
     return conda_list_json(ctx.base_prefix, ctx.conda_exe, runner)
 
 
+def load_snapshot(ctx: CondaContext, runner: Runner = _run) -> PackageSnapshot:
+    """Load a compact :class:`PackageSnapshot` for the base environment.
+
+    The raw ``conda list`` JSON is only kept long enough to build the records.
+    """
+    return PackageSnapshot.from_json(conda_list_json(ctx.base_prefix, ctx.conda_exe, runner))
+
+
+_PIP_ANCHOR = re.compile(r"^(?:lib/python[^/]+|Lib)/site-packages/([^/]+?\.(?:dist-info|egg-info))(?:/RECORD|/PKG-INFO)?$")
+
+
+def _site_packages(prefix: str, python_version: str) -> Optional[str]:
+    for short in (f"lib/python{'.'.join(python_version.split('.')[:2])}/site-packages", "Lib/site-packages"):
+        if os.path.isdir(os.path.join(prefix, short)):
+            return os.path.join(prefix, short)
+    return None
+
+
+def _read_pip_metadata(path: str) -> Optional[PackageRecord]:
+    """Build a ``pypi`` record from a ``.dist-info`` or ``.egg-info`` entry's headers."""
+    if os.path.isdir(path):
+        path = os.path.join(path, "METADATA" if path.endswith(".dist-info") else "PKG-INFO")
+    headers: Dict[str, str] = {}
+    try:
+        with open(path, encoding="utf-8", errors="replace") as fh:
+            for line in fh:
+                if not line.strip():
+                    break
+                key, sep, value = line.partition(":")
+                if sep and key in ("Name", "Version"):
+                    headers[key] = value.strip()
+    except OSError:
+        return None
+    if not headers.get("Name") or not headers.get("Version"):
+        return None
+    # Same name normalisation and pseudo channel/build as ``conda list``.
+    name = headers["Name"].replace(".", "-").replace("_", "-").lower()
+    return PackageRecord(name, headers["Version"], build="pypi_0", channel="pypi", subdir="pypi")
+
+
+def load_pip_records(prefix: str, conda_records: Iterable[PackageRecord], anchors: Iterable[str]) -> List[PackageRecord]:
+    """Return records for Python packages in ``prefix`` that conda did not install.
+
+    Mirrors how ``conda list`` finds pip packages: every ``*.dist-info`` /
+    ``*.egg-info`` entry in the python's ``site-packages`` that is not one of
+    the conda-owned ``anchors`` is read. Eggs and ``.egg-link`` development
+    installs are not reported.
+    """
+    python = next((r for r in conda_records if r.name == "python"), None)
+    site_packages = _site_packages(prefix, python.version) if python is not None else None
+    if site_packages is None:
+        return []
+    owned = set(anchors)
+    records = []
+    with os.scandir(site_packages) as entries:
+        for entry in entries:
+            if entry.name in owned or not entry.name.endswith((".dist-info", ".egg-info")):
+                continue
+            record = _read_pip_metadata(entry.path)
+            if record is not None:
+                records.append(record)
+    return records
+
+
+def load_conda_meta(prefix: str, *, include_pip: bool = False) -> PackageSnapshot:
+    """Read a prefix's installed records straight from ``<prefix>/conda-meta``.
+
+    Unlike :func:`load_snapshot` this never starts conda, and the records keep
+    ``url``, ``md5`` and ``sha256``. With ``include_pip``, packages installed
+    into ``site-packages`` by pip are added as ``pypi`` records (see
+    :func:`load_pip_records`), giving the same package set as ``conda list``.
+    Raises RuntimeError when a record file is unreadable or corrupt, since the
+    snapshot would silently be incomplete.
+    """
+    meta_dir = os.path.join(prefix, "conda-meta")
+    try:
+        names = [n for n in os.listdir(meta_dir) if n.endswith(".json")]
+    except FileNotFoundError:
+        raise RuntimeError(f"No conda-meta directory in {prefix}") from None
+
+    records = []
+    anchors = set()
+    for name in names:
+        try:
+            with open(os.path.join(meta_dir, name), encoding="utf-8") as fh:
+                entry = json.load(fh)
+        except (OSError, ValueError) as exc:
+            raise RuntimeError(f"Unreadable conda-meta record {os.path.join(meta_dir, name)}: {exc}") from exc
+        if not isinstance(entry, dict):
+            raise RuntimeError(f"Unreadable conda-meta record {os.path.join(meta_dir, name)}: not a JSON object")
+        if include_pip:
+            for path in entry.get("files") or ():
+                if "-info" in path:
+                    match = _PIP_ANCHOR.match(path)
+                    if match:
+                        anchors.add(match.group(1))
+        # Build the record right away so the large "files" lists are freed.
+        record = PackageRecord.from_json(entry)
+        if record is not None:
+            records.append(record)
+    if include_pip:
+        # A pip install over a conda package wins, as in ``conda list``.
+        records += load_pip_records(prefix, records, anchors)
+    return PackageSnapshot(records)
+
+
 def make_conda_context(
     base_prefix: Optional[str] = None,
     conda_exe: Optional[str] = None,
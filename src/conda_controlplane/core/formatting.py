@@ -1,17 +1,27 @@
 from __future__ import annotations
 
 import json
-from typing import Dict, Iterable, List
+from typing import Dict, Iterable, List, Mapping
+
+from .common import PackageSnapshot
 
 Category = Dict[str, object]
 Report = Dict[str, object]
 
 
-def _fmt_packages(packages: Dict[str, str]) -> List[str]:
+def _fmt_packages(packages: Mapping[str, str], *, detail: bool = False) -> List[str]:
     if not packages:
         return ["  (none detected)"]
     width = max(len(n) for n in packages)
-    return [f"  {name.ljust(width)}  {packages[name]}" for name in sorted(packages)]
+    if not (detail and isinstance(packages, PackageSnapshot)):
+        return [f"  {name.ljust(width)}  {packages[name]}" for name in sorted(packages)]
+    records = list(packages.records())
+    vwidth = max(len(r.version) for r in records)
+    bwidth = max(len(r.build) for r in records)
+    return [
+        f"  {r.name.ljust(width)}  {r.version.ljust(vwidth)}  {r.build.ljust(bwidth)}  {r.channel}".rstrip()
+        for r in records
+    ]
 
 
 def _fmt_execs(execs: Dict[str, str | None]) -> List[str]:
@@ -62,7 +72,7 @@ def format_category_table(cat: Category, *, verbose: bool = False) -> str:
         for note in cat["notes"]:
             lines.append(f"- {note}")
     lines.append("packages")
-    lines.extend(_fmt_packages(cat.get("packages", {})))
+    lines.extend(_fmt_packages(cat.get("packages", {}), detail=True))
     lines.append("executables")
     lines.extend(_fmt_execs(cat.get("executables", {})))
     return "\n".join(lines)
@@ -78,5 +88,33 @@ def format_report_table(report: Report, *, verbose: bool = False) -> str:
     return "\n\n".join(parts)
 
 
+def format_policy_summary(report: Report, *, verbose: bool = False) -> str:
+    prefixes = report.get("prefixes", {})
+    lines = [f"=== Base Environment Policy ({report.get('rules', 0)} rules) ==="]
+    for prefix in sorted(prefixes):
+        result = prefixes[prefix]
+        violations = result.get("violations", {})
+        count = sum(len(v) for v in violations.values())
+        lines.append("")
+        if result.get("error"):
+            lines.append(f"{prefix}: ERROR {result['error']}")
+            continue
+        lines.append(f"{prefix}: {'OK' if result.get('ok') else f'{count} violation(s)'}")
+        for category in sorted(violations):
+            lines.append(f"  [{category}]")
+            for v in violations[category]:
+                what = v["package"] if v.get("version") is None else f"{v['package']} {v['version']}"
+                lines.append(f"    {v['kind']:<9}  {what}  ({v['rule']})")
+                if verbose and v.get("message"):
+                    lines.append(f"               {v['message']}")
+    return "\n".join(lines)
+
+
+def _json_default(obj: object) -> object:
+    if isinstance(obj, PackageSnapshot):
+        return dict(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
 def format_json(payload: Dict[str, object]) -> str:
-    return json.dumps(payload, indent=2, sort_keys=True)
+    return json.dumps(payload, indent=2, sort_keys=True, default=_json_default)
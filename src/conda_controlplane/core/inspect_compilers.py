@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Callable, Dict, Optional
+from typing import Callable, Dict, Mapping, Optional
 
 from .common import select_versions
 from .conda_base import CondaContext
@@ -9,7 +9,7 @@ from .inspect_solvers import _default_exec_resolver, ExecutableResolver
 
 def inspect_compilers(
     ctx: CondaContext,
-    pkg_versions: Dict[str, str],
+    pkg_versions: Mapping[str, str],
     exec_resolver: Optional[ExecutableResolver] = None,
 ) -> Dict[str, object]:
     resolver = exec_resolver or _default_exec_resolver(ctx)
@@ -1,9 +1,9 @@
 from __future__ import annotations
 
-from typing import Callable, Dict, List, Optional
+from typing import Callable, Dict, List, Optional, Union
 
-from .common import package_map
-from .conda_base import CondaContext, load_packages
+from .common import PackageSnapshot
+from .conda_base import CondaContext, load_snapshot
 from .inspect_compilers import inspect_compilers
 from .inspect_network import inspect_network
 from .inspect_packaging import inspect_packaging
@@ -11,24 +11,34 @@ from .inspect_solvers import inspect_solvers
 
 PackageJson = List[Dict[str, object]]
 
+CATEGORY_INSPECTORS = {
+    "solvers": inspect_solvers,
+    "compilers": inspect_compilers,
+    "packaging": inspect_packaging,
+    "network": inspect_network,
+}
+
 
 def inspect_all(
     ctx: CondaContext,
     *,
-    packages: Optional[PackageJson] = None,
+    packages: Optional[Union[PackageSnapshot, PackageJson]] = None,
     exec_resolver: Optional[Callable[[str], Optional[str]]] = None,
 ) -> Dict[str, object]:
-    """Inspect all categories with a shared package snapshot."""
-    pkgs = packages or load_packages(ctx)
-    pkg_map = package_map(pkgs)
+    """Inspect all categories with a shared package snapshot.
+
+    ``packages`` may be a :class:`PackageSnapshot` or raw ``conda list --json``
+    entries; it is loaded from the base prefix when omitted.
+    """
+    if isinstance(packages, PackageSnapshot):
+        snapshot = packages
+    elif packages:
+        snapshot = PackageSnapshot.from_json(packages)
+    else:
+        snapshot = load_snapshot(ctx)
 
     return {
         "base_prefix": ctx.base_prefix,
         "bin_dir": ctx.bin_dir,
-        "categories": {
-            "solvers": inspect_solvers(ctx, pkg_map, exec_resolver),
-            "compilers": inspect_compilers(ctx, pkg_map, exec_resolver),
-            "packaging": inspect_packaging(ctx, pkg_map, exec_resolver),
-            "network": inspect_network(ctx, pkg_map, exec_resolver),
-        },
+        "categories": {name: inspect(ctx, snapshot, exec_resolver) for name, inspect in CATEGORY_INSPECTORS.items()},
     }
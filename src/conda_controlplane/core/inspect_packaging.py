@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 import platform
-from typing import Dict, Optional
+from typing import Dict, Mapping, Optional
 
 from .common import select_versions
 from .conda_base import CondaContext
@@ -10,7 +10,7 @@ from .inspect_solvers import _default_exec_resolver, ExecutableResolver
 
 def inspect_packaging(
     ctx: CondaContext,
-    pkg_versions: Dict[str, str],
+    pkg_versions: Mapping[str, str],
     exec_resolver: Optional[ExecutableResolver] = None,
 ) -> Dict[str, object]:
     resolver = exec_resolver or _default_exec_resolver(ctx)
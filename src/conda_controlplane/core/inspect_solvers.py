@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 import os
-from typing import Callable, Dict, Optional
+from typing import Callable, Dict, Mapping, Optional
 
 from .common import select_versions
 from .conda_base import CondaContext
@@ -23,7 +23,7 @@ def _default_exec_resolver(ctx: CondaContext) -> ExecutableResolver:
 
 def inspect_solvers(
     ctx: CondaContext,
-    pkg_versions: Dict[str, str],
+    pkg_versions: Mapping[str, str],
     exec_resolver: Optional[ExecutableResolver] = None,
 ) -> Dict[str, object]:
     resolver = exec_resolver or _default_exec_resolver(ctx)
@@ -46,6 +46,7 @@ def inspect_solvers(
         "executables": exec_sel,
         "notes": [
             "Focuses on solver selection, auth/TLS stack, and platform tagging.",
-            "Package presence is taken from conda base via `conda list -p <base> --json`.",
+            "Package presence is taken from conda base via `conda list -p <base> --json` "
+            "(`export` reads the same conda and pip records from conda-meta and site-packages).",
         ],
     }
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import os
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .. import __version__
+from .common import PackageSnapshot
+from .conda_base import CondaContext, guess_bindir, load_conda_meta
+from .inspect_controlplane import CATEGORY_INSPECTORS
+
+HASH_KINDS = ("md5", "sha256")
+
+
+def _no_executables(name: str) -> Optional[str]:
+    return None
+
+
+def category_packages(prefix: str, snapshot: PackageSnapshot, categories: Iterable[str]) -> List[str]:
+    """Return the names the given control-plane categories select from ``snapshot``."""
+    ctx = CondaContext(conda_exe="", base_prefix=prefix, bin_dir=guess_bindir(prefix))
+    names = set()
+    for category in categories:
+        try:
+            inspect = CATEGORY_INSPECTORS[category]
+        except KeyError:
+            raise ValueError(
+                f"Unknown category {category!r} (expected one of {', '.join(CATEGORY_INSPECTORS)})"
+            ) from None
+        names.update(inspect(ctx, snapshot, _no_executables)["packages"])
+    return sorted(names)
+
+
+def format_explicit_lock(snapshot: PackageSnapshot, *, hash_kind: str = "md5") -> str:
+    """Render ``snapshot`` as a ``conda list --explicit`` style lockfile.
+
+    Lines are ``<url>#<hash>`` sorted by package name, so the same records
+    always give byte-identical output. Records without a URL cannot be
+    installed explicitly and are listed as comments at the end.
+    """
+    if hash_kind not in HASH_KINDS:
+        raise ValueError(f"hash_kind must be one of {', '.join(HASH_KINDS)} (got {hash_kind!r})")
+
+    subdirs = Counter(r.subdir for r in snapshot.records() if r.subdir and r.subdir != "noarch")
+    platform = min(subdirs, key=lambda s: (-subdirs[s], s)) if subdirs else "noarch"
+
+    lines = [
+        "# This file may be used to create an environment using:",
+        "# $ conda create --name <env> --file <this file>",
+        f"# platform: {platform}",
+        f"# created-by: conda-controlplane {__version__}",
+        "@EXPLICIT",
+    ]
+    missing = []
+    for record in snapshot.records():
+        if not record.url:
+            missing.append(f"# no url: {record.name}-{record.version}-{record.build}")
+            continue
+        digest = getattr(record, hash_kind)
+        lines.append(f"{record.url}#{digest}" if digest else record.url)
+    return "\n".join(lines + missing) + "\n"
+
+
+def export_lock(
+    prefix: str,
+    *,
+    categories: Optional[Sequence[str]] = None,
+    hash_kind: str = "md5",
+) -> str:
+    """Build an explicit lockfile for ``prefix`` from its ``conda-meta`` records.
+
+    With ``categories``, only the packages those categories select are locked.
+    Conda is never invoked.
+    """
+    snapshot = load_conda_meta(prefix)
+    if categories:
+        snapshot = snapshot.select(category_packages(prefix, snapshot, categories))
+    return format_explicit_lock(snapshot, hash_kind=hash_kind)
+
+
+def export_locks(
+    prefixes: Iterable[str],
+    *,
+    categories: Optional[Sequence[str]] = None,
+    hash_kind: str = "md5",
+    max_workers: Optional[int] = None,
+) -> Tuple[Dict[str, str], Dict[str, str]]:
+    """Export lockfiles for many prefixes in parallel.
+
+    Returns ``(locks, errors)``, both keyed by sorted prefix: one unreadable
+    prefix is reported in ``errors`` without losing the others' lockfiles.
+    """
+    ordered = sorted(set(prefixes))
+
+    def _lock(prefix: str) -> Tuple[Optional[str], Optional[str]]:
+        try:
+            return export_lock(prefix, categories=categories, hash_kind=hash_kind), None
+        except (OSError, RuntimeError) as exc:
+            return None, str(exc)
+
+    workers = max_workers or min(32, (os.cpu_count() or 1) + 4)
+    locks: Dict[str, str] = {}
+    errors: Dict[str, str] = {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for prefix, (lock, error) in zip(ordered, pool.map(_lock, ordered)):
+            if error is None:
+                locks[prefix] = lock
+            else:
+                errors[prefix] = error
+    return locks, errors
@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import os
+import tempfile
+import time
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+from .common import PackageSnapshot
+
+Report = Dict[str, object]
+
+TEXTFILE_NAME = "conda_controlplane.prom"
+
+_PREFIX = "conda_controlplane"
+
+
+def _escape(value: object) -> str:
+    """Escape a label value per the OpenMetrics text exposition format."""
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(pairs: Iterable[Tuple[str, object]]) -> str:
+    return ",".join(f'{k}="{_escape(v)}"' for k, v in pairs)
+
+
+def _family(name: str, help_text: str, samples: List[str], kind: str = "gauge") -> List[str]:
+    return [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}", *samples]
+
+
+def format_openmetrics(
+    report: Report,
+    *,
+    timings: Optional[Mapping[str, float]] = None,
+    cache: Optional[Mapping[str, int]] = None,
+) -> str:
+    """Render a report as OpenMetrics text (also valid Prometheus text format).
+
+    Emits one gauge sample per prefix/category/package (version, plus build
+    and channel when the category holds a :class:`PackageSnapshot`) and per
+    category executable (1 when resolved, 0 otherwise), plus the tool's own
+    scan durations when ``timings`` is given and snapshot cache metrics when
+    ``cache`` (``hit``/``hits``/``misses``) is given; ``hits`` and ``misses``
+    are cumulative, so they are emitted as ``_total`` counters.
+    """
+    prefix = report.get("base_prefix") or ""
+    cats = report.get("categories", {})
+
+    pkg_samples: List[str] = []
+    exec_samples: List[str] = []
+    count_samples: List[str] = []
+    for category in sorted(cats):
+        cat = cats[category]
+        packages = cat.get("packages", {})
+        for name in sorted(packages):
+            pairs = [("prefix", prefix), ("category", category), ("package", name), ("version", packages[name])]
+            record = packages.record(name) if isinstance(packages, PackageSnapshot) else None
+            if record is not None:
+                pairs += [("build", record.build), ("channel", record.channel)]
+            labels = _labels(pairs)
+            pkg_samples.append(f"{_PREFIX}_package_info{{{labels}}} 1")
+        executables = cat.get("executables", {})
+        for name in sorted(executables):
+            labels = _labels([("prefix", prefix), ("category", category), ("executable", name)])
+            exec_samples.append(f"{_PREFIX}_executable_resolved{{{labels}}} {1 if executables[name] else 0}")
+        labels = _labels([("prefix", prefix), ("category", category)])
+        count_samples.append(f"{_PREFIX}_category_packages{{{labels}}} {len(packages)}")
+
+    lines: List[str] = []
+    lines += _family(f"{_PREFIX}_package_info", "Package present in prefix, version as a label.", pkg_samples)
+    lines += _family(f"{_PREFIX}_executable_resolved", "Executable resolved in the prefix bin dir.", exec_samples)
+    lines += _family(f"{_PREFIX}_category_packages", "Number of packages detected per category.", count_samples)
+    if timings:
+        samples = [
+            f"{_PREFIX}_scan_duration_seconds{{{_labels([('prefix', prefix), ('phase', phase)])}}} {timings[phase]:.6f}"
+            for phase in sorted(timings)
+        ]
+        lines += _family(f"{_PREFIX}_scan_duration_seconds", "Wall-clock duration of the scan phase.", samples)
+    if cache:
+        prefix_labels = _labels([("prefix", prefix)])
+        lookups = cache["hits"] + cache["misses"]
+        ratio = cache["hits"] / lookups if lookups else 0
+        for metric, help_text, value in (
+            ("snapshot_cache_hit", "Last scan reused the cached snapshot.", cache["hit"]),
+            ("snapshot_cache_hit_ratio", "Cumulative snapshot cache hit ratio.", ratio),
+        ):
+            lines += _family(f"{_PREFIX}_{metric}", help_text, [f"{_PREFIX}_{metric}{{{prefix_labels}}} {value:g}"])
+        for metric, help_text, value in (
+            ("snapshot_cache_hits", "Snapshot cache hits.", cache["hits"]),
+            ("snapshot_cache_misses", "Snapshot cache misses.", cache["misses"]),
+        ):
+            sample = f"{_PREFIX}_{metric}_total{{{prefix_labels}}} {value:g}"
+            lines += _family(f"{_PREFIX}_{metric}", help_text, [sample], kind="counter")
+    stamp = f"{_PREFIX}_last_scan_timestamp_seconds{{{_labels([('prefix', prefix)])}}} {time.time():.3f}"
+    lines += _family(f"{_PREFIX}_last_scan_timestamp_seconds", "Unix time of the last scan.", [stamp])
+    lines.append("# EOF")
+    return "\n".join(lines) + "\n"
+
+
+def format_policy_openmetrics(report: Report) -> str:
+    """Render a policy report as OpenMetrics violation counts per prefix/category.
+
+    Every rule category in ``report["categories"]`` gets a sample for every
+    evaluated prefix, so a fixed violation drops to 0 instead of vanishing.
+    Prefixes that could not be read only report ``policy_scan_error``.
+    """
+    prefixes = report.get("prefixes", {})
+    categories = set(report.get("categories", []))
+    for result in prefixes.values():
+        categories.update(result.get("violations", {}))
+
+    ok_samples: List[str] = []
+    error_samples: List[str] = []
+    violation_samples: List[str] = []
+    for prefix in sorted(prefixes):
+        result = prefixes[prefix]
+        prefix_labels = _labels([("prefix", prefix)])
+        error_samples.append(f"{_PREFIX}_policy_scan_error{{{prefix_labels}}} {1 if result.get('error') else 0}")
+        if result.get("error"):
+            continue
+        ok_samples.append(f"{_PREFIX}_policy_ok{{{prefix_labels}}} {1 if result.get('ok') else 0}")
+        violations = result.get("violations", {})
+        for category in sorted(categories):
+            labels = _labels([("prefix", prefix), ("category", category)])
+            violation_samples.append(f"{_PREFIX}_policy_violations{{{labels}}} {len(violations.get(category, []))}")
+
+    lines: List[str] = []
+    lines += _family(f"{_PREFIX}_policy_ok", "Prefix satisfies every policy rule.", ok_samples)
+    lines += _family(f"{_PREFIX}_policy_violations", "Policy violations per category.", violation_samples)
+    lines += _family(f"{_PREFIX}_policy_scan_error", "Prefix could not be read for policy evaluation.", error_samples)
+    lines.append("# EOF")
+    return "\n".join(lines) + "\n"
+
+
+def write_textfile(directory: str, text: str, *, name: str = TEXTFILE_NAME) -> str:
+    """Atomically write ``text`` to ``directory/name`` and return the path.
+
+    The content goes to a temporary file in the same directory which is then
+    renamed over the target, so a textfile collector never reads a partial file.
+    """
+    os.makedirs(directory, exist_ok=True)
+    target = os.path.join(directory, name)
+    fd, tmp = tempfile.mkstemp(prefix=f".{name}.", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            fh.write(text)
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, target)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except FileNotFoundError:
+            pass
+        raise
+    return target
@@ -0,0 +1,222 @@
+from __future__ import annotations
+
+import json
+import tomllib
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, List, Mapping, Optional, Tuple
+
+from .versions import VersionMatcher, compile_version_spec
+
+RULE_KINDS = ("required", "forbidden", "version")
+
+# Mirrors docs/base-env-policy.md. A rule file replaces this list entirely.
+DEFAULT_RULES: List[Dict[str, Any]] = [
+    {
+        "id": "conda-present",
+        "kind": "required",
+        "category": "core",
+        "packages": ["conda"],
+        "message": "Base must contain conda itself.",
+    },
+    {
+        "id": "solver-plugin",
+        "kind": "required",
+        "any": True,
+        "category": "solvers",
+        "packages": ["conda-libmamba-solver"],
+        "message": "A solver plugin (conda-libmamba-solver) should be installed in base.",
+    },
+    {
+        "id": "tls-chain",
+        "kind": "required",
+        "category": "auth-tls",
+        "packages": ["openssl", "ca-certificates", "certifi"],
+        "message": "The auth/TLS chain used by conda should be present.",
+    },
+    {
+        "id": "no-scientific-stack",
+        "kind": "forbidden",
+        "category": "runtime-stacks",
+        "packages": ["numpy", "scipy", "pandas", "matplotlib"],
+        "message": "Scientific computing stacks belong in project environments.",
+    },
+    {
+        "id": "no-ml-stack",
+        "kind": "forbidden",
+        "category": "runtime-stacks",
+        "packages": ["pytorch", "torch", "tensorflow", "scikit-learn"],
+        "message": "Machine learning stacks belong in project environments.",
+    },
+    {
+        "id": "no-web-frameworks",
+        "kind": "forbidden",
+        "category": "runtime-stacks",
+        "packages": ["django", "flask", "fastapi"],
+        "message": "Web frameworks belong in project environments.",
+    },
+    {
+        "id": "no-data-processing",
+        "kind": "forbidden",
+        "category": "runtime-stacks",
+        "packages": ["dask", "ray", "pyspark"],
+        "message": "Data processing frameworks belong in project environments.",
+    },
+    {
+        "id": "single-python",
+        "kind": "forbidden",
+        "category": "python",
+        "packages": ["python2", "pypy", "pypy3.9", "pypy3.10", "graalpy"],
+        "message": "Base should carry one Python interpreter, the one conda runs on.",
+    },
+    {
+        "id": "python-supported",
+        "kind": "version",
+        "category": "python",
+        "packages": ["python"],
+        "spec": ">=3.8",
+        "message": "Base Python is older than conda supports.",
+    },
+]
+
+
+class PolicyError(ValueError):
+    """Raised when a policy rule file is malformed."""
+
+
+@dataclass(frozen=True)
+class PolicyRule:
+    id: str
+    kind: str
+    category: str
+    packages: Tuple[str, ...]
+    message: str = ""
+    spec: Optional[str] = None
+    any: bool = False
+
+
+def _rule_from_dict(raw: Mapping[str, Any], index: int) -> PolicyRule:
+    if not isinstance(raw, Mapping):
+        raise PolicyError(f"rule #{index}: expected a table of rule fields (got {type(raw).__name__})")
+    kind = raw.get("kind")
+    if kind not in RULE_KINDS:
+        raise PolicyError(f"rule #{index}: kind must be one of {', '.join(RULE_KINDS)} (got {kind!r})")
+    packages = raw.get("packages")
+    if isinstance(packages, str):
+        packages = [packages]
+    if not isinstance(packages, list) or not packages or not all(isinstance(p, str) for p in packages):
+        raise PolicyError(f"rule #{index}: packages must be a non-empty list of names")
+    spec = raw.get("spec")
+    if kind == "version" and not isinstance(spec, str):
+        raise PolicyError(f"rule #{index}: version rules need a spec string")
+    return PolicyRule(
+        id=str(raw.get("id") or f"rule-{index}"),
+        kind=kind,
+        category=str(raw.get("category") or "general"),
+        packages=tuple(packages),
+        message=str(raw.get("message") or ""),
+        spec=spec if kind == "version" else None,
+        any=bool(raw.get("any", False)),
+    )
+
+
+def parse_rules(raw_rules: List[Mapping[str, Any]]) -> List[PolicyRule]:
+    """Validate raw rule mappings (as found in a rule file) into rules."""
+    return [_rule_from_dict(raw, i) for i, raw in enumerate(raw_rules)]
+
+
+def load_rules(path: Optional[str] = None) -> List[PolicyRule]:
+    """Load rules from a TOML or JSON rule file, or the built-in defaults.
+
+    The file holds a top-level ``rules`` array, e.g. ``[[rules]]`` tables in
+    TOML.
+    """
+    if path is None:
+        return parse_rules(DEFAULT_RULES)
+    with open(path, "rb") as fh:
+        try:
+            data = json.load(fh) if path.endswith(".json") else tomllib.load(fh)
+        except (json.JSONDecodeError, tomllib.TOMLDecodeError) as exc:
+            raise PolicyError(f"{path}: {exc}") from exc
+    raw_rules = data.get("rules") if isinstance(data, dict) else None
+    if not isinstance(raw_rules, list):
+        raise PolicyError(f"{path}: expected a top-level 'rules' array")
+    return parse_rules(raw_rules)
+
+
+class CompiledPolicy:
+    """Rules compiled into set lookups and version matchers.
+
+    Forbidden and version rules are indexed by package name so a snapshot is
+    evaluated in a single pass over its packages; required rules are keyed
+    lookups into the snapshot.
+    """
+
+    def __init__(self, rules: List[PolicyRule]) -> None:
+        self.rules = list(rules)
+        self._required: List[Tuple[PolicyRule, FrozenSet[str]]] = []
+        self._forbidden: Dict[str, List[PolicyRule]] = {}
+        self._versions: Dict[str, List[Tuple[PolicyRule, VersionMatcher]]] = {}
+        for rule in self.rules:
+            if rule.kind == "required":
+                self._required.append((rule, frozenset(rule.packages)))
+            elif rule.kind == "forbidden":
+                for name in rule.packages:
+                    self._forbidden.setdefault(name, []).append(rule)
+            else:
+                try:
+                    matcher = compile_version_spec(rule.spec or "")
+                except ValueError as exc:
+                    raise PolicyError(f"rule {rule.id}: {exc}") from exc
+                for name in rule.packages:
+                    self._versions.setdefault(name, []).append((rule, matcher))
+
+    @property
+    def categories(self) -> List[str]:
+        """Sorted categories covered by the rules."""
+        return sorted({rule.category for rule in self.rules})
+
+    def evaluate(self, pkg_versions: Mapping[str, str]) -> Dict[str, object]:
+        """Evaluate a ``name -> version`` snapshot.
+
+        Returns ``{"ok": bool, "checked": int, "violations": {category: [...]}}``.
+        """
+        violations: Dict[str, List[Dict[str, object]]] = {}
+
+        def _add(rule: PolicyRule, package: Optional[str], version: Optional[str] = None) -> None:
+            violations.setdefault(rule.category, []).append(
+                {
+                    "rule": rule.id,
+                    "kind": rule.kind,
+                    "package": package,
+                    "version": version,
+                    "message": rule.message,
+                }
+            )
+
+        forbidden, versions = self._forbidden, self._versions
+        for name, ver in pkg_versions.items():
+            if name in forbidden:
+                for rule in forbidden[name]:
+                    _add(rule, name, ver)
+            if name in versions:
+                for rule, matcher in versions[name]:
+                    if not matcher(ver):
+                        _add(rule, name, ver)
+
+        for rule, names in self._required:
+            if rule.any:
+                if not any(name in pkg_versions for name in names):
+                    _add(rule, " | ".join(rule.packages))
+            else:
+                for name in rule.packages:
+                    if name not in pkg_versions:
+                        _add(rule, name)
+
+        for items in violations.values():
+            items.sort(key=lambda v: (str(v["rule"]), str(v["package"])))
+        return {"ok": not violations, "checked": len(self.rules), "violations": violations}
+
+
+def compile_policy(rules: Optional[List[PolicyRule]] = None) -> CompiledPolicy:
+    """Compile ``rules`` (default: :data:`DEFAULT_RULES`) for evaluation."""
+    return CompiledPolicy(rules if rules is not None else load_rules())
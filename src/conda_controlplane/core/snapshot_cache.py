@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import glob
+import hashlib
+import json
+import os
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+from .. import __version__
+from .common import PackageRecord, PackageSnapshot
+from .conda_base import load_conda_meta
+from .metrics import write_textfile
+
+CACHE_ENV = "CONDA_CONTROLPLANE_CACHE"
+
+# Bump when the cached record layout changes so old entries are rebuilt.
+_CACHE_VERSION = 1
+
+CacheStats = Dict[str, int]
+
+
+def cache_dir(env: Optional[Mapping[str, str]] = None) -> str:
+    """Return the snapshot cache directory.
+
+    ``$CONDA_CONTROLPLANE_CACHE`` wins, otherwise
+    ``$XDG_CACHE_HOME/conda-controlplane/snapshots`` (``~/.cache`` when unset).
+    """
+    env = os.environ if env is None else env
+    explicit = env.get(CACHE_ENV)
+    if explicit:
+        return explicit
+    cache_home = env.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(cache_home, "conda-controlplane", "snapshots")
+
+
+def _fingerprint(prefix: str) -> List[object]:
+    """Cheap change detector for a prefix: a few ``stat`` calls, no file reads.
+
+    Every conda transaction adds/removes ``conda-meta/*.json`` files (bumping
+    the directory mtime) and appends to ``conda-meta/history``; pip installs
+    add/remove ``*.dist-info`` entries in ``site-packages``.
+    """
+    meta = os.path.join(prefix, "conda-meta")
+    key: List[object] = [_CACHE_VERSION, __version__, os.stat(meta).st_mtime_ns]
+    try:
+        st = os.stat(os.path.join(meta, "history"))
+        key += [st.st_mtime_ns, st.st_size]
+    except FileNotFoundError:
+        key += [0, 0]
+    site_packages = sorted(glob.glob(os.path.join(prefix, "lib", "python*", "site-packages")))
+    site_packages.append(os.path.join(prefix, "Lib", "site-packages"))
+    for path in site_packages:
+        try:
+            key.append(os.stat(path).st_mtime_ns)
+        except FileNotFoundError:
+            pass
+    return key
+
+
+def _read_json(path: str) -> Dict[str, Any]:
+    try:
+        with open(path, encoding="utf-8") as fh:
+            data = json.load(fh)
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def _cached_snapshot(entry: Mapping[str, Any], key: List[object]) -> Optional[PackageSnapshot]:
+    if entry.get("key") != key:
+        return None
+    try:
+        return PackageSnapshot(PackageRecord(**r) for r in entry["records"])
+    except (KeyError, TypeError, AttributeError, ValueError):
+        # Written by another record layout or hand-edited: rebuild it.
+        return None
+
+
+def cached_conda_meta(prefix: str, directory: Optional[str] = None) -> Tuple[PackageSnapshot, CacheStats]:
+    """Load a prefix snapshot (conda and pip records), reusing a cached copy.
+
+    Uses :func:`load_conda_meta` with ``include_pip`` on a miss. The cache
+    entry is reused while the prefix fingerprint is unchanged and is only
+    rewritten on a miss; the cumulative counters live in a small separate
+    file. The returned stats hold ``hit`` (0/1 for this call) and the
+    cumulative ``hits``/``misses`` for the prefix. Cache write failures are
+    ignored, and an unusable cache file counts as a miss.
+    """
+    directory = directory or cache_dir()
+    stem = hashlib.sha1(os.path.abspath(prefix).encode("utf-8")).hexdigest()
+    key = _fingerprint(prefix)
+
+    snapshot = _cached_snapshot(_read_json(os.path.join(directory, stem + ".json")), key)
+    hit = 0 if snapshot is None else 1
+    if snapshot is None:
+        snapshot = load_conda_meta(prefix, include_pip=True)
+        entry = {"prefix": prefix, "key": key, "records": [r.to_dict() for r in snapshot.records()]}
+        try:
+            write_textfile(directory, json.dumps(entry, sort_keys=True), name=stem + ".json")
+        except OSError:
+            pass
+
+    counts = _read_json(os.path.join(directory, stem + ".counts"))
+    try:
+        hits, misses = int(counts.get("hits", 0)), int(counts.get("misses", 0))
+    except (TypeError, ValueError):
+        hits, misses = 0, 0
+    hits, misses = hits + hit, misses + 1 - hit
+    try:
+        write_textfile(directory, json.dumps({"hits": hits, "misses": misses}), name=stem + ".counts")
+    except OSError:
+        pass
+    return snapshot, {"hit": hit, "hits": hits, "misses": misses}
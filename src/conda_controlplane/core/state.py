@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import glob
+import os
+import re
+import time
+from functools import lru_cache
+from typing import Dict, List, Mapping, Optional
+
+from .common import PackageSnapshot
+from .conda_base import CondaContext
+from .metrics import write_textfile
+from .policy import CompiledPolicy, compile_policy
+
+STATE_ENV = "CONDA_CONTROLPLANE_STATE"
+
+# Keys written to the state file, in order. The zsh shim reads these.
+STATE_KEYS = (
+    "prefix",
+    "solver",
+    "solver_version",
+    "conda_version",
+    "base_revision",
+    "policy",
+    "policy_violations",
+    "updated",
+)
+
+
+@lru_cache(maxsize=1)
+def _builtin_policy() -> CompiledPolicy:
+    return compile_policy()
+
+
+def state_path(env: Optional[Mapping[str, str]] = None) -> str:
+    """Return the state file path.
+
+    ``$CONDA_CONTROLPLANE_STATE`` wins, otherwise
+    ``$XDG_STATE_HOME/conda-controlplane/state`` (``~/.local/state`` when unset).
+    """
+    env = os.environ if env is None else env
+    explicit = env.get(STATE_ENV)
+    if explicit:
+        return explicit
+    state_home = env.get("XDG_STATE_HOME") or os.path.join(os.path.expanduser("~"), ".local", "state")
+    return os.path.join(state_home, "conda-controlplane", "state")
+
+
+def base_revision(prefix: str) -> Optional[int]:
+    """Return the current revision number of ``prefix`` from ``conda-meta/history``.
+
+    Matches ``conda list --revisions``: the first ``==> ... <==`` block is
+    revision 0. Returns None when there is no history file.
+    """
+    try:
+        with open(os.path.join(prefix, "conda-meta", "history"), "rb") as fh:
+            count = sum(1 for line in fh if line.startswith(b"==>"))
+    except OSError:
+        return None
+    return max(count - 1, 0)
+
+
+_SOLVER_LINE = re.compile(r"""^solver:\s*["']?([A-Za-z0-9_-]+)""", re.MULTILINE)
+
+
+def _condarc_paths(prefix: str, env: Mapping[str, str]) -> List[str]:
+    """Condarc locations in conda's search order (later files win)."""
+    home = os.path.expanduser("~")
+    xdg = env.get("XDG_CONFIG_HOME") or os.path.join(home, ".config")
+    paths = ["/etc/conda/.condarc", "/etc/conda/condarc", *sorted(glob.glob("/etc/conda/condarc.d/*.yml"))]
+    paths += ["/var/lib/conda/.condarc", "/var/lib/conda/condarc"]
+    paths += [os.path.join(prefix, ".condarc"), os.path.join(prefix, "condarc")]
+    paths += [os.path.join(xdg, "conda", ".condarc"), os.path.join(xdg, "conda", "condarc")]
+    paths += [os.path.join(home, ".conda", ".condarc"), os.path.join(home, ".condarc")]
+    if env.get("CONDA_PREFIX"):
+        paths.append(os.path.join(env["CONDA_PREFIX"], ".condarc"))
+    if env.get("CONDARC"):
+        paths.append(env["CONDARC"])
+    return paths
+
+
+def configured_solver(prefix: str, env: Mapping[str, str]) -> Optional[str]:
+    """Return the solver set via ``$CONDA_SOLVER`` or a condarc ``solver:`` key.
+
+    This is a heuristic, not conda's config loader: condarc files are scanned
+    for a top-level ``solver:`` line rather than parsed as YAML, and
+    ``.d`` directories other than ``/etc/conda/condarc.d`` are not searched.
+    """
+    if env.get("CONDA_SOLVER"):
+        return env["CONDA_SOLVER"]
+    solver = None
+    for path in _condarc_paths(prefix, env):
+        try:
+            with open(path, encoding="utf-8") as fh:
+                match = _SOLVER_LINE.search(fh.read())
+        except OSError:
+            continue
+        if match:
+            solver = match.group(1)
+    return solver
+
+
+def _solver(snapshot: Mapping[str, str], prefix: str, env: Mapping[str, str]) -> Dict[str, str]:
+    configured = configured_solver(prefix, env)
+    if configured is None:
+        # conda >= 23.10 defaults to libmamba whenever the plugin is installed.
+        configured = "libmamba" if "conda-libmamba-solver" in snapshot else "classic"
+    if configured == "classic":
+        return {"solver": "classic", "solver_version": snapshot.get("conda", "")}
+    if configured == "libmamba":
+        return {"solver": "libmamba", "solver_version": snapshot.get("conda-libmamba-solver", "")}
+    return {"solver": configured, "solver_version": ""}
+
+
+def build_state(
+    ctx: CondaContext,
+    snapshot: PackageSnapshot,
+    *,
+    policy_result: Optional[Mapping[str, object]] = None,
+    env: Optional[Mapping[str, str]] = None,
+    now: Optional[float] = None,
+) -> Dict[str, str]:
+    """Summarise a base snapshot into the flat ``key -> value`` prompt state.
+
+    ``policy_result`` is an evaluation from :class:`CompiledPolicy`; the
+    built-in policy is evaluated when it is omitted.
+    """
+    env = os.environ if env is None else env
+    if policy_result is None:
+        policy_result = _builtin_policy().evaluate(snapshot)
+    violations = policy_result.get("violations") or {}
+    revision = base_revision(ctx.base_prefix)
+
+    state = {"prefix": ctx.base_prefix}
+    state.update(_solver(snapshot, ctx.base_prefix, env))
+    state["conda_version"] = snapshot.get("conda", "")
+    state["base_revision"] = "" if revision is None else str(revision)
+    state["policy"] = "ok" if policy_result.get("ok") else "fail"
+    state["policy_violations"] = str(sum(len(v) for v in violations.values()))
+    state["updated"] = str(int(time.time() if now is None else now))
+    return state
+
+
+def format_state(state: Mapping[str, str]) -> str:
+    """Render state as ``key=value`` lines, the format the zsh shim parses."""
+    lines = []
+    for key in STATE_KEYS:
+        value = str(state.get(key, "")).replace("\n", " ")
+        lines.append(f"{key}={value}")
+    return "\n".join(lines) + "\n"
+
+
+def write_state(state: Mapping[str, str], path: Optional[str] = None) -> str:
+    """Atomically write ``state`` to ``path`` (default :func:`state_path`)."""
+    path = path or state_path()
+    directory, name = os.path.split(os.path.abspath(path))
+    return write_textfile(directory, format_state(state), name=name)
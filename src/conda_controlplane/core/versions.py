@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+import re
+from functools import lru_cache, total_ordering
+from typing import Callable, List, Tuple, Union
+
+# A version component element: ints compare numerically, strings lexically,
+# and every string sorts before every int (so ``1.0a1 < 1.0``). ``dev`` sorts
+# before any other string and ``post`` after any int, as in conda.
+Element = Tuple[int, Union[int, str]]
+
+_DEV: Element = (0, "")
+_ZERO: Element = (2, 0)
+_POST: Element = (3, "")
+_UNDERSCORE: Element = (1, "_")
+
+_SPLIT = re.compile(r"\d+|[a-z]+")
+_TERM = re.compile(r"^(>=|<=|==|!=|~=|>|<|=)?\s*([0-9A-Za-z._+!*]+)$")
+
+VersionMatcher = Callable[[str], bool]
+
+
+def _element(token: str) -> Element:
+    if token.isdigit():
+        return (2, int(token))
+    if token == "dev":
+        return _DEV
+    if token == "post":
+        return _POST
+    return (1, token)
+
+
+def _component(part: str) -> Tuple[Element, ...]:
+    tokens = _SPLIT.findall(part)
+    if not tokens:
+        return (_ZERO,)
+    elements = [_element(t) for t in tokens]
+    if not tokens[0].isdigit():
+        # conda treats "a1" as "0a1" so letters never outrank a bare number.
+        elements.insert(0, _ZERO)
+    return tuple(elements)
+
+
+def _cmp_padded(a: Tuple, b: Tuple, fill) -> int:
+    for i in range(max(len(a), len(b))):
+        x = a[i] if i < len(a) else fill
+        y = b[i] if i < len(b) else fill
+        if x != y:
+            return -1 if x < y else 1
+    return 0
+
+
+def _cmp_components(a: Tuple[Tuple[Element, ...], ...], b: Tuple[Tuple[Element, ...], ...]) -> int:
+    for i in range(max(len(a), len(b))):
+        x = a[i] if i < len(a) else (_ZERO,)
+        y = b[i] if i < len(b) else (_ZERO,)
+        c = _cmp_padded(x, y, _ZERO)
+        if c:
+            return c
+    return 0
+
+
+def _normalized(components: Tuple[Tuple[Element, ...], ...]) -> Tuple[Tuple[Element, ...], ...]:
+    """Strip the zero padding equality ignores, giving one key per equal version."""
+    out = []
+    for component in components:
+        elements = list(component)
+        while elements and elements[-1] == _ZERO:
+            elements.pop()
+        out.append(tuple(elements))
+    while out and not out[-1]:
+        out.pop()
+    return tuple(out)
+
+
+@total_ordering
+class VersionOrder:
+    """Parsed conda version supporting conda's ordering rules.
+
+    Handles an optional ``epoch!`` prefix and ``+local`` suffix; ``.``, ``_``
+    and ``-`` separate components, and missing components compare as zero so
+    ``1.0 == 1.0.0``. A trailing ``_`` is kept as a suffix rather than a
+    separator (openssl style), so ``1.1_ < 1.1a1 < 1.1``. Use
+    :func:`parse_version` to get cached instances.
+    """
+
+    __slots__ = ("source", "epoch", "release", "local")
+
+    def __init__(self, version: str) -> None:
+        self.source = version
+        text = version.strip().lower()
+        epoch, sep, rest = text.partition("!")
+        if not sep:
+            epoch, rest = "0", text
+        release, _, local = rest.partition("+")
+        self.epoch = int(epoch) if epoch.isdigit() else 0
+        self.release = self._parts(release)
+        if release.endswith("_") and self.release:
+            self.release = self.release[:-1] + (self.release[-1] + (_UNDERSCORE,),)
+        self.local = self._parts(local) if local else ()
+
+    @staticmethod
+    def _parts(text: str) -> Tuple[Tuple[Element, ...], ...]:
+        return tuple(_component(p) for p in re.split(r"[._-]", text) if p)
+
+    def _cmp(self, other: "VersionOrder") -> int:
+        if self.epoch != other.epoch:
+            return -1 if self.epoch < other.epoch else 1
+        return _cmp_components(self.release, other.release) or _cmp_components(self.local, other.local)
+
+    def startswith(self, other: "VersionOrder") -> bool:
+        """Return True when ``other``'s release components prefix this version."""
+        if self.epoch != other.epoch or len(other.release) > len(self.release):
+            return False
+        return all(
+            _cmp_padded(mine, theirs, _ZERO) == 0 for mine, theirs in zip(self.release, other.release)
+        )
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, VersionOrder):
+            return NotImplemented
+        return self._cmp(other) == 0
+
+    def __lt__(self, other: "VersionOrder") -> bool:
+        return self._cmp(other) < 0
+
+    def __hash__(self) -> int:
+        return hash((self.epoch, _normalized(self.release), _normalized(self.local)))
+
+    def __repr__(self) -> str:
+        return f"VersionOrder({self.source!r})"
+
+
+@lru_cache(maxsize=4096)
+def parse_version(version: str) -> VersionOrder:
+    """Return a cached :class:`VersionOrder` for ``version``."""
+    return VersionOrder(version)
+
+
+def _term_matcher(term: str) -> VersionMatcher:
+    m = _TERM.match(term.strip())
+    if not m:
+        raise ValueError(f"Invalid version constraint: {term!r}")
+    op, ver = m.group(1) or "", m.group(2)
+
+    if ver.endswith("*"):
+        if op not in ("", "=", "==", "!="):
+            raise ValueError(f"Wildcard only allowed with equality or inequality: {term!r}")
+        prefix = parse_version(ver.rstrip("*").rstrip("."))
+        if op == "!=":
+            return lambda v: not parse_version(v).startswith(prefix)
+        return lambda v: parse_version(v).startswith(prefix)
+    target = parse_version(ver)
+
+    if op == "=":
+        return lambda v: parse_version(v).startswith(target)
+    if op in ("", "=="):
+        return lambda v: parse_version(v) == target
+    if op == "!=":
+        return lambda v: parse_version(v) != target
+    if op == ">=":
+        return lambda v: parse_version(v) >= target
+    if op == "<=":
+        return lambda v: parse_version(v) <= target
+    if op == ">":
+        return lambda v: parse_version(v) > target
+    if op == "<":
+        return lambda v: parse_version(v) < target
+    # "~=": at least ``ver`` and within its release series.
+    series = parse_version(ver.rsplit(".", 1)[0]) if "." in ver else target
+    return lambda v: parse_version(v) >= target and parse_version(v).startswith(series)
+
+
+@lru_cache(maxsize=1024)
+def compile_version_spec(spec: str) -> VersionMatcher:
+    """Compile a conda-style version spec into a predicate over version strings.
+
+    ``,`` binds tighter than ``|``: ``">=1.0,<2|>=3"`` means
+    ``(>=1.0 and <2) or >=3``. ``1.2.*`` and ``=1.2`` are prefix matches,
+    ``!=1.2.*`` excludes a prefix, and a bare ``1.2`` is an exact match.
+    """
+    groups: List[List[VersionMatcher]] = [
+        [_term_matcher(t) for t in alt.split(",") if t.strip()] for alt in spec.split("|")
+    ]
+    if not any(groups):
+        raise ValueError(f"Empty version spec: {spec!r}")
+    return lambda v: any(all(m(v) for m in group) for group in groups if group)
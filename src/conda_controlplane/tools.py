@@ -1,16 +1,17 @@
 from __future__ import annotations
 
 import os
-from dataclasses import dataclass
-from typing import Any, Dict, List, Optional
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Mapping, Optional, Sequence
 
-from conda_controlplane.core.common import package_map
-from conda_controlplane.core.conda_base import CondaContext, load_packages, make_conda_context
+from conda_controlplane.core.common import PackageSnapshot
+from conda_controlplane.core.conda_base import CondaContext, load_snapshot, make_conda_context
 from conda_controlplane.core.inspect_compilers import inspect_compilers
 from conda_controlplane.core.inspect_controlplane import inspect_all
 from conda_controlplane.core.inspect_network import inspect_network
 from conda_controlplane.core.inspect_packaging import inspect_packaging
 from conda_controlplane.core.inspect_solvers import inspect_solvers
+from conda_controlplane.core.lockfile import export_lock as _export_lock
 
 
 @dataclass(frozen=True)
@@ -21,6 +22,8 @@ class Section:
     packages: Dict[str, str]
     executables: Dict[str, Optional[str]]
     notes: List[str]
+    # name -> PackageRecord fields (build, channel, subdir, ...); plain JSON types.
+    records: Dict[str, Dict[str, object]] = field(default_factory=dict)
 
 
 def _ctx(prefix_override: Optional[str] = None) -> CondaContext:
@@ -34,14 +37,18 @@ def _section(payload: Dict[str, object]) -> Section:
     packages = payload.get("packages")
     executables = payload.get("executables")
     notes = payload.get("notes")
+    records = {}
+    if isinstance(packages, PackageSnapshot):
+        records = {r.name: r.to_dict() for r in packages.records()}
 
     return Section(
         title=str(title) if isinstance(title, str) else "",
         base_prefix=str(base_prefix) if isinstance(base_prefix, str) else "",
         bin_dir=str(bin_dir) if isinstance(bin_dir, str) else "",
-        packages=dict(packages) if isinstance(packages, dict) else {},
+        packages=dict(packages) if isinstance(packages, Mapping) else {},
         executables=dict(executables) if isinstance(executables, dict) else {},
         notes=list(notes) if isinstance(notes, list) else [],
+        records=records,
     )
 
 
@@ -49,7 +56,7 @@ def get_solvers_section(prefix: Optional[str] = None) -> Section:
     """Return the Solvers/Auth/Platform section for the given base prefix."""
 
     ctx = _ctx(prefix)
-    pkgs = package_map(load_packages(ctx))
+    pkgs = load_snapshot(ctx)
     return _section(inspect_solvers(ctx, pkgs))
 
 
@@ -57,7 +64,7 @@ def get_compilers_section(prefix: Optional[str] = None) -> Section:
     """Return the Compiler Metapackages & Build Orchestrators section."""
 
     ctx = _ctx(prefix)
-    pkgs = package_map(load_packages(ctx))
+    pkgs = load_snapshot(ctx)
     return _section(inspect_compilers(ctx, pkgs))
 
 
@@ -65,7 +72,7 @@ def get_packaging_section(prefix: Optional[str] = None) -> Section:
     """Return the Packaging Helpers section."""
 
     ctx = _ctx(prefix)
-    pkgs = package_map(load_packages(ctx))
+    pkgs = load_snapshot(ctx)
     return _section(inspect_packaging(ctx, pkgs))
 
 
@@ -73,7 +80,7 @@ def get_network_section(prefix: Optional[str] = None) -> Section:
     """Return the Network/TLS section."""
 
     ctx = _ctx(prefix)
-    pkgs = package_map(load_packages(ctx))
+    pkgs = load_snapshot(ctx)
     return _section(inspect_network(ctx, pkgs))
 
 
@@ -99,5 +106,23 @@ def get_full_report(prefix: Optional[str] = None, sample_n: int = 20) -> Dict[st
 
     ctx = _ctx(prefix)
     payload = inspect_all(ctx)
+    for cat in payload["categories"].values():
+        cat["packages"] = dict(cat["packages"])
     payload["binaries"] = get_binaries(prefix, sample_n=sample_n)
     return payload
+
+
+def export_lock(
+    prefix: Optional[str] = None,
+    categories: Optional[Sequence[str]] = None,
+    hash_kind: str = "md5",
+) -> str:
+    """Return an explicit ``url#hash`` lockfile for the prefix.
+
+    Built from ``conda-meta`` records without running conda; ``categories``
+    limits it to the packages those sections select. This mirrors the CLI
+    output of: `conda-controlplane export --lock`.
+    """
+
+    target = prefix or _ctx().base_prefix
+    return _export_lock(target, categories=categories, hash_kind=hash_kind)
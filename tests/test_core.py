@@ -1,10 +1,25 @@
+import contextlib
+import dataclasses
+import io
+import json
+import os
+import tempfile
 import unittest
 from unittest import mock
 
-from conda_controlplane.core.conda_base import CondaContext, guess_bindir
-from conda_controlplane.core.formatting import format_report_summary
+from conda_controlplane.cli.main import main
+from conda_controlplane.core.common import PackageSnapshot
+from conda_controlplane.core.conda_base import CondaContext, guess_bindir, load_conda_meta
+from conda_controlplane.core.formatting import format_json, format_report_summary, format_report_table
 from conda_controlplane.core.inspect_controlplane import inspect_all
 from conda_controlplane.core.inspect_solvers import inspect_solvers
+from conda_controlplane.core.lockfile import export_lock, export_locks
+from conda_controlplane.core.metrics import format_openmetrics, format_policy_openmetrics, write_textfile
+from conda_controlplane.core.policy import PolicyError, compile_policy, parse_rules
+from conda_controlplane.core.snapshot_cache import cached_conda_meta
+from conda_controlplane.core.state import build_state, write_state
+from conda_controlplane.core.versions import compile_version_spec, parse_version
+from conda_controlplane.tools import _section
 
 
 def _ctx(prefix: str = "/base") -> CondaContext:
@@ -78,6 +93,243 @@ class TestControlPlane(unittest.TestCase):
         self.assertIn("Packages:", rendered)
         self.assertIn("Notes:", rendered)
 
+    def test_format_openmetrics_emits_gauges(self):
+        ctx = _ctx()
+        pkgs = {"conda-libmamba-solver": "1.0.0"}
+        cat = inspect_solvers(ctx, pkgs, exec_resolver=_exec_resolver())
+        payload = {"base_prefix": ctx.base_prefix, "bin_dir": ctx.bin_dir, "categories": {"solvers": cat}}
+        rendered = format_openmetrics(payload, timings={"total": 0.5})
+        self.assertIn(
+            'conda_controlplane_package_info{prefix="/base",category="solvers",'
+            'package="conda-libmamba-solver",version="1.0.0"} 1',
+            rendered,
+        )
+        self.assertIn('conda_controlplane_executable_resolved{prefix="/base",category="solvers",executable="conda"} 1', rendered)
+        self.assertIn('conda_controlplane_executable_resolved{prefix="/base",category="solvers",executable="mamba"} 0', rendered)
+        self.assertIn('conda_controlplane_scan_duration_seconds{prefix="/base",phase="total"} 0.500000', rendered)
+        self.assertTrue(rendered.endswith("# EOF\n"))
+
+    def test_write_textfile_replaces_atomically(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            write_textfile(tmp, "old\n")
+            path = write_textfile(tmp, "new\n")
+            self.assertEqual(os.listdir(tmp), [os.path.basename(path)])
+            with open(path, encoding="utf-8") as fh:
+                self.assertEqual(fh.read(), "new\n")
+
+    def test_version_order_follows_conda_rules(self):
+        ordered = ["1.0dev1", "1.0a1", "1.0rc1", "1.0", "1.0.post1", "1.0.1", "1.9", "1.10", "1!0.1"]
+        for lower, higher in zip(ordered, ordered[1:]):
+            self.assertLess(parse_version(lower), parse_version(higher))
+        self.assertEqual(parse_version("1.0"), parse_version("1.0.0"))
+        self.assertTrue(compile_version_spec(">=3.8,<4")("3.11.7"))
+        self.assertFalse(compile_version_spec("1.2.*")("1.20"))
+        self.assertTrue(compile_version_spec("<2|>=3")("3.1"))
+        self.assertFalse(compile_version_spec("!=1.2.*")("1.2.3"))
+        self.assertTrue(compile_version_spec(">=1,!=1.2.*")("1.20"))
+        self.assertEqual(len({parse_version("1.0"), parse_version("1.0.0")}), 1)
+        self.assertEqual({parse_version("1.0"): "x"}.get(parse_version("1.0.0")), "x")
+        self.assertLess(parse_version("1.1_"), parse_version("1.1a1"))
+        for bad in ("(>=3.8", ">=", "1.0 2"):
+            with self.assertRaises(ValueError):
+                compile_version_spec(bad)
+
+    def test_policy_reports_violations_per_category(self):
+        policy = compile_policy(
+            parse_rules(
+                [
+                    {"id": "solver", "kind": "required", "any": True, "category": "solvers",
+                     "packages": ["conda-libmamba-solver", "mamba"]},
+                    {"id": "no-numpy", "kind": "forbidden", "category": "runtime", "packages": ["numpy"]},
+                    {"id": "py", "kind": "version", "category": "python", "packages": ["python"], "spec": ">=3.10"},
+                ]
+            )
+        )
+        result = policy.evaluate({"numpy": "1.26", "python": "3.9.18"})
+        self.assertFalse(result["ok"])
+        self.assertEqual(set(result["violations"]), {"solvers", "runtime", "python"})
+        self.assertEqual(result["violations"]["runtime"][0]["package"], "numpy")
+        self.assertTrue(policy.evaluate({"mamba": "1.5", "python": "3.12.1"})["ok"])
+        with self.assertRaises(PolicyError):
+            parse_rules(["x"])
+
+        report = {
+            "categories": policy.categories,
+            "prefixes": {"/base": policy.evaluate({"mamba": "1.5", "python": "3.12.1"}), "/gone": {"error": "missing"}},
+        }
+        rendered = format_policy_openmetrics(report)
+        self.assertIn('conda_controlplane_policy_violations{prefix="/base",category="runtime"} 0', rendered)
+        self.assertIn('conda_controlplane_policy_scan_error{prefix="/gone"} 1', rendered)
+
+    def test_package_snapshot_is_sorted_version_mapping(self):
+        entries = [
+            {"name": "zstd", "version": "1.5.6", "build_string": "hc292b87_0", "build_number": 0,
+             "channel": "pkgs/main", "platform": "linux-64"},
+            {"name": "certifi", "version": "2024.2.2", "build_string": "py311_0", "build_number": 0,
+             "channel": "conda-forge", "platform": "noarch"},
+            {"name": None, "version": "1.0"},
+        ]
+        snapshot = PackageSnapshot.from_json(entries)
+        self.assertEqual(list(snapshot), ["certifi", "zstd"])
+        self.assertEqual(snapshot, {"certifi": "2024.2.2", "zstd": "1.5.6"})
+        record = snapshot.record("certifi")
+        self.assertEqual((record.build, record.channel, record.subdir), ("py311_0", "conda-forge", "noarch"))
+        self.assertFalse(hasattr(record, "__dict__"))
+        self.assertEqual(list(snapshot.select(["zstd", "missing"])), ["zstd"])
+
+    def test_formatters_consume_snapshot(self):
+        ctx = _ctx()
+        snapshot = PackageSnapshot.from_json(
+            [{"name": "libmamba", "version": "2.0.5", "build_string": "haf1ee3a_1", "channel": "pkgs/main"}]
+        )
+        cat = inspect_solvers(ctx, snapshot, exec_resolver=_exec_resolver())
+        self.assertIsInstance(cat["packages"], PackageSnapshot)
+        payload = {"base_prefix": ctx.base_prefix, "bin_dir": ctx.bin_dir, "categories": {"solvers": cat}}
+        self.assertIn('"libmamba": "2.0.5"', format_json(payload))
+        self.assertIn("haf1ee3a_1  pkgs/main", format_report_table(payload))
+
+        section = _section(cat)
+        self.assertEqual(section.packages, {"libmamba": "2.0.5"})
+        self.assertEqual(section.records["libmamba"]["build"], "haf1ee3a_1")
+        json.dumps(dataclasses.asdict(section))
+
+    def test_state_file_summarises_base(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            os.makedirs(os.path.join(tmp, "conda-meta"))
+            with open(os.path.join(tmp, "conda-meta", "history"), "w", encoding="utf-8") as fh:
+                fh.write("==> 2024-01-01 00:00:00 <==\n+defaults::conda-24.1.0\n==> 2024-02-01 00:00:00 <==\n")
+            snapshot = PackageSnapshot.from_versions({"conda": "24.1.0", "conda-libmamba-solver": "24.1.0", "numpy": "1.26"})
+            state = build_state(_ctx(tmp), snapshot, env={"CONDA_SOLVER": "libmamba"}, now=1700000000)
+            self.assertEqual(state["solver"], "libmamba")
+            condarc = os.path.join(tmp, "condarc")
+            with open(condarc, "w", encoding="utf-8") as fh:
+                fh.write("channels:\n  - defaults\nsolver: classic\n")
+            self.assertEqual(build_state(_ctx(tmp), snapshot, env={"CONDARC": condarc})["solver"], "classic")
+            self.assertEqual(state["base_revision"], "1")
+            self.assertEqual(state["policy"], "fail")
+            path = write_state(state, os.path.join(tmp, "state", "state"))
+            with open(path, encoding="utf-8") as fh:
+                lines = fh.read().splitlines()
+            self.assertIn("solver_version=24.1.0", lines)
+            self.assertEqual(lines[-1], "updated=1700000000")
+
+    def _write_conda_meta(self, prefix, records):
+        meta = os.path.join(prefix, "conda-meta")
+        os.makedirs(meta)
+        for rec in records:
+            fn = f"{rec['name']}-{rec['version']}-{rec['build']}"
+            rec = dict({"files": ["bin/x"]}, **rec)
+            rec = dict(rec, subdir="linux-64", channel="https://conda.anaconda.org/conda-forge/linux-64",
+                       url=f"https://conda.anaconda.org/conda-forge/linux-64/{fn}.conda",
+                       md5=f"md5-{rec['name']}", sha256=f"sha-{rec['name']}")
+            with open(os.path.join(meta, f"{fn}.json"), "w", encoding="utf-8") as fh:
+                json.dump(rec, fh)
+
+    def test_export_lock_reads_conda_meta(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            self._write_conda_meta(
+                tmp,
+                [
+                    {"name": "openssl", "version": "3.2.0", "build": "h0_0"},
+                    {"name": "conda-libmamba-solver", "version": "24.1.0", "build": "pyhd_0"},
+                    {"name": "numpy", "version": "1.26.4", "build": "py311_0"},
+                ],
+            )
+            lock = export_lock(tmp)
+            body = lock.split("@EXPLICIT\n", 1)[1].splitlines()
+            self.assertIn("# platform: linux-64", lock)
+            self.assertEqual(
+                body,
+                [
+                    "https://conda.anaconda.org/conda-forge/linux-64/conda-libmamba-solver-24.1.0-pyhd_0.conda#md5-conda-libmamba-solver",
+                    "https://conda.anaconda.org/conda-forge/linux-64/numpy-1.26.4-py311_0.conda#md5-numpy",
+                    "https://conda.anaconda.org/conda-forge/linux-64/openssl-3.2.0-h0_0.conda#md5-openssl",
+                ],
+            )
+            solvers = export_lock(tmp, categories=["solvers"], hash_kind="sha256")
+            self.assertIn("conda-libmamba-solver-24.1.0-pyhd_0.conda#sha-conda-libmamba-solver", solvers)
+            self.assertNotIn("numpy", solvers)
+            self.assertEqual(export_locks([tmp, tmp]), ({tmp: lock}, {}))
+
+            missing = os.path.join(tmp, "missing")
+            locks, errors = export_locks([tmp, missing])
+            self.assertEqual(list(locks), [tmp])
+            self.assertIn("No conda-meta directory", errors[missing])
+            out_dir = os.path.join(tmp, "locks")
+            with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()) as err:
+                code = main(["export", "--lock", "--prefix", tmp, "--prefix", missing, "--output-dir", out_dir])
+            self.assertEqual(code, 2)
+            self.assertIn(f"ERROR: {missing}", err.getvalue())
+            self.assertEqual(os.listdir(out_dir), [f"{os.path.basename(tmp)}.txt"])
+
+            with open(os.path.join(tmp, "conda-meta", "broken-1.0-0.json"), "w", encoding="utf-8") as fh:
+                fh.write("{not json")
+            with self.assertRaises(RuntimeError):
+                export_lock(tmp)
+
+    def test_policy_sees_pip_installed_packages(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            self._write_conda_meta(
+                tmp,
+                [
+                    {"name": "python", "version": "3.11.7", "build": "h0_0"},
+                    {"name": "requests", "version": "2.31.0", "build": "py311_0",
+                     "files": ["lib/python3.11/site-packages/requests-2.31.0.dist-info/RECORD"]},
+                ],
+            )
+            site_packages = os.path.join(tmp, "lib", "python3.11", "site-packages")
+            for name, version in (("requests", "2.31.0"), ("Django", "4.2")):
+                dist = os.path.join(site_packages, f"{name}-{version}.dist-info")
+                os.makedirs(dist)
+                with open(os.path.join(dist, "METADATA"), "w", encoding="utf-8") as fh:
+                    fh.write(f"Metadata-Version: 2.1\nName: {name}\nVersion: {version}\n\nbody\n")
+
+            self.assertNotIn("django", load_conda_meta(tmp))
+            snapshot = load_conda_meta(tmp, include_pip=True)
+            self.assertEqual(snapshot.record("django").channel, "pypi")
+            self.assertEqual(snapshot.record("requests").channel, "conda-forge")
+
+            out = io.StringIO()
+            with mock.patch("conda_controlplane.cli.main.make_conda_context") as make_ctx, \
+                    mock.patch.dict(os.environ, {"CONDA_CONTROLPLANE_STATE": os.path.join(tmp, "state")}), \
+                    contextlib.redirect_stdout(out):
+                code = main(["--base-prefix", tmp, "policy", "--prefix", tmp, "--exit-code"])
+            make_ctx.assert_not_called()
+            self.assertEqual(code, 1)
+            self.assertIn("django", out.getvalue())
+
+    def test_snapshot_cache_hits_until_conda_meta_changes(self):
+        with tempfile.TemporaryDirectory() as tmp, tempfile.TemporaryDirectory() as cache:
+            self._write_conda_meta(tmp, [{"name": "openssl", "version": "3.2.0", "build": "h0_0"}])
+            first, stats = cached_conda_meta(tmp, cache)
+            self.assertEqual(stats, {"hit": 0, "hits": 0, "misses": 1})
+            (entry_name,) = [n for n in os.listdir(cache) if n.endswith(".json")]
+            entry_path = os.path.join(cache, entry_name)
+            written = os.stat(entry_path).st_mtime_ns
+            second, stats = cached_conda_meta(tmp, cache)
+            self.assertEqual(stats["hit"], 1)
+            self.assertEqual(second.record("openssl"), first.record("openssl"))
+            self.assertEqual(os.stat(entry_path).st_mtime_ns, written)
+
+            with open(os.path.join(tmp, "conda-meta", "history"), "a", encoding="utf-8") as fh:
+                fh.write("==> 2024-01-01 00:00:00 <==\n")
+            _, stats = cached_conda_meta(tmp, cache)
+            self.assertEqual(stats, {"hit": 0, "hits": 1, "misses": 2})
+
+            with open(entry_path, encoding="utf-8") as fh:
+                entry = json.load(fh)
+            entry["records"][0]["extra"] = 1
+            for corrupt in (json.dumps(entry), "[]"):
+                with open(entry_path, "w", encoding="utf-8") as fh:
+                    fh.write(corrupt)
+                snapshot, stats = cached_conda_meta(tmp, cache)
+                self.assertEqual((stats["hit"], snapshot["openssl"]), (0, "3.2.0"))
+
+            payload = {"base_prefix": tmp, "categories": {}}
+            rendered = format_openmetrics(payload, cache=stats)
+            self.assertIn("conda_controlplane_snapshot_cache_hit_ratio", rendered)
+            self.assertIn("# TYPE conda_controlplane_snapshot_cache_misses counter", rendered)
+            self.assertIn(f'conda_controlplane_snapshot_cache_misses_total{{prefix="{tmp}"}} 4', rendered)
 
 if __name__ == "__main__":
     unittest.main()